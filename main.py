@@ -3,23 +3,61 @@ Music file deduplication script for finding and removing duplicate files.
 This script identifies duplicates based on song titles and provides options for handling them.
 """
 
-import re
+import errno
 import hashlib
+import mmap
 import subprocess
 import os
 import shutil
+import shlex
+import sqlite3
+import sys
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from collections import defaultdict
-from typing import Dict, List
+from typing import (
+    Dict,
+    Hashable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+HASH_CACHE_PATH = Path("~/.cache/mpd-flac-organizer/hashes.sqlite").expanduser()
+HASH_CHUNK_SIZE = 1024 * 1024
+HASH_WORKERS = min(8, (os.cpu_count() or 1) * 2)
+DOWNLOAD_WORKERS = 3
+
+# (name, path, stat) for a scanned .flac file
+FlacEntry = Tuple[str, Path, os.stat_result]
+K = TypeVar("K", bound=Hashable)
 
 
 def clear():
     os.system("cls" if os.name == "nt" else "clear")
 
 
+_download_lock = threading.Lock()
+
+
 def download_playlist(url) -> None:
+    # Each download gets its own directory so concurrent playlists can't write
+    # to the same file. Finished tracks are then moved into the current one.
+    download_dir = Path(tempfile.mkdtemp(prefix=".yt-dlp-", dir="."))
     cmd = [
         "yt-dlp",
+        "--no-progress",
+        "--paths",
+        str(download_dir),
         "-x",
         "--audio-format",
         "flac",
@@ -34,104 +72,387 @@ def download_playlist(url) -> None:
     ]
 
     print(f"Downloading: {url}")
-    subprocess.run(cmd)
+    try:
+        subprocess.run(cmd)
+
+        with _download_lock:
+            for src in sorted(download_dir.iterdir()):
+                dst = Path.cwd() / src.name
+                if dst.exists():
+                    # Same as yt-dlp skipping a file that was already downloaded
+                    print(f"  Skipping {src.name}: already exists")
+                    continue
+                os.replace(src, dst)
+    finally:
+        shutil.rmtree(download_dir, ignore_errors=True)
 
 
 def extract_song_title(filename: str) -> str:
     """Extract song title from filename, removing track numbers and extensions."""
+    title = filename
     # Remove track numbers at the beginning (e.g., "01 - ", "166 - ")
-    title = re.sub(r"^\d+\s*-\s*", "", filename)
+    if title[:1].isdecimal():
+        head, sep, tail = title.partition("-")
+        if sep and head.rstrip().isdecimal():
+            title = tail.lstrip()
     # Remove file extension
-    title = re.sub(r"\.[^.]+$", "", title)
+    if "." in title:
+        title = title.rsplit(".", 1)[0]
     # Remove quotes if present
     title = title.strip("'\"")
     return title.strip()
 
 
+class HashCache:
+    """Persistent cache of file hashes keyed by (device, inode, size, mtime)."""
+
+    def __init__(self, db_path: Path = HASH_CACHE_PATH):
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(db_path))
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS blake2b_hashes ("
+            "dev INT, ino INT, size INT, mtime_ns INT, digest TEXT, "
+            "PRIMARY KEY(dev, ino))"
+        )
+
+    @staticmethod
+    def _key_stat(path: Path, st: Optional[os.stat_result]) -> Optional[os.stat_result]:
+        # DirEntry.stat() leaves st_dev/st_ino at 0 on Windows, so ask os.stat()
+        # for a real file ID. Files still without one can't be cached safely.
+        if st is None or st.st_ino == 0:
+            st = os.stat(path)
+        return st if st.st_ino else None
+
+    def get(self, path: Path, st: Optional[os.stat_result] = None) -> Optional[str]:
+        """Return the cached digest for path, or None if missing or stale."""
+        st = self._key_stat(path, st)
+        if st is None:
+            return None
+        row = self.conn.execute(
+            "SELECT size, mtime_ns, digest FROM blake2b_hashes "
+            "WHERE dev = ? AND ino = ?",
+            (st.st_dev, st.st_ino),
+        ).fetchone()
+        if row and row[0] == st.st_size and row[1] == st.st_mtime_ns:
+            return row[2]
+        return None
+
+    def put(self, path: Path, digest: str, st: Optional[os.stat_result] = None):
+        """Store the digest for path, replacing any previous entry."""
+        st = self._key_stat(path, st)
+        if st is None:
+            return
+        self.conn.execute(
+            "INSERT OR REPLACE INTO blake2b_hashes VALUES (?, ?, ?, ?, ?)",
+            (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns, digest),
+        )
+
+    def commit(self):
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
 def get_file_hash(filepath: Path) -> str:
-    """Calculate MD5 hash of file content."""
-    hash_md5 = hashlib.md5()
+    """Calculate BLAKE2b hash of file content."""
+    hasher = hashlib.blake2b(digest_size=16)
+    with open(filepath, "rb") as f:
+        if hasattr(os, "posix_fadvise"):
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        try:
+            # Map the whole file so hashlib consumes it in a single C call
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if hasattr(mm, "madvise") and hasattr(mmap, "MADV_SEQUENTIAL"):
+                    mm.madvise(mmap.MADV_SEQUENTIAL)
+                hasher.update(mm)
+        except ValueError:
+            # Empty files can't be mapped
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+                hasher.update(chunk)
+        # The file won't be read again, so don't let it evict useful pages
+        if hasattr(os, "posix_fadvise"):
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+    return hasher.hexdigest()
+
+
+def sample_hash(filepath: Path, size: int, nbytes: int = 64 * 1024) -> int:
+    """Calculate a fast non-cryptographic hash of a file's head, tail and size.
+
+    Only the first and last `nbytes` are read. Uses xxh3 when the xxhash
+    package is installed, BLAKE2b otherwise.
+    """
     with open(filepath, "rb") as f:
-        for chunk in iter(lambda: f.read(4096), b""):
-            hash_md5.update(chunk)
-    return hash_md5.hexdigest()
+        data = f.read(nbytes)
+        if size > nbytes:
+            f.seek(max(nbytes, size - nbytes))
+            data += f.read(nbytes)
+    data += size.to_bytes(8, "big")
+    if xxhash is not None:
+        return xxhash.xxh3_64_intdigest(data)
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "big")
 
 
-def find_duplicates_by_title(directory: str) -> Dict[str, List[Path]]:
-    """Find duplicate files based on song titles."""
-    duplicates = defaultdict(list)
+class StreamInfo(NamedTuple):
+    """Audio properties from a FLAC file's STREAMINFO block."""
 
-    music_dir = Path(directory)
-    if not music_dir.exists():
-        print(f"Directory {directory} does not exist!")
-        return {}
+    sample_rate: int
+    channels: int
+    bits_per_sample: int
+    total_samples: int
+    md5: bytes
 
-    # Group files by extracted song title
-    for file_path in music_dir.glob("*.flac"):
-        title = extract_song_title(file_path.name)
-        duplicates[title].append(file_path)
 
-    # Filter to only keep actual duplicates (more than 1 file per title)
-    return {title: files for title, files in duplicates.items() if len(files) > 1}
+def read_flac_streaminfo(filepath: Path) -> Optional[StreamInfo]:
+    """Read the STREAMINFO block of a FLAC file.
 
+    Returns None if the file isn't a FLAC stream. `md5` is the signature of
+    the decoded audio and is all zero bytes if the encoder didn't set it.
+    """
+    with open(filepath, "rb") as f:
+        if f.read(4) != b"fLaC":
+            return None
 
-def find_duplicates_by_hash(directory: str) -> Dict[str, List[Path]]:
-    """Find duplicate files based on file content hash."""
-    duplicates = defaultdict(list)
-
-    music_dir = Path(directory)
-    if not music_dir.exists():
-        print(f"Directory {directory} does not exist!")
-        return {}
+        while True:
+            header = f.read(4)
+            if len(header) < 4:
+                return None
+
+            is_last = header[0] & 0x80
+            block_type = header[0] & 0x7F
+            length = int.from_bytes(header[1:], "big")
+
+            if block_type == 0:  # STREAMINFO
+                streaminfo = f.read(length)
+                if len(streaminfo) < 34:
+                    return None
+                # 20 bits sample rate, 3 bits channels - 1,
+                # 5 bits bits-per-sample - 1, 36 bits total samples
+                packed = int.from_bytes(streaminfo[10:18], "big")
+                return StreamInfo(
+                    sample_rate=packed >> 44,
+                    channels=((packed >> 41) & 0x7) + 1,
+                    bits_per_sample=((packed >> 36) & 0x1F) + 1,
+                    total_samples=packed & 0xFFFFFFFFF,
+                    md5=streaminfo[18:34],
+                )
+
+            if is_last:
+                return None
+            f.seek(length, 1)
+
+
+def iter_flacs(directory: Path) -> Iterator[FlacEntry]:
+    """Yield (name, path, stat) for every regular .flac file in directory."""
+    with os.scandir(directory) as it:
+        for entry in it:
+            if entry.name.endswith(".flac") and entry.is_file(follow_symlinks=False):
+                yield entry.name, Path(entry.path), entry.stat(follow_symlinks=False)
+
+
+def scan_flacs(directory: Path) -> List[FlacEntry]:
+    """List every .flac in directory along with its stat result."""
+    return list(iter_flacs(directory))
+
+
+def group_duplicates(files: List[Path], keys: List[K]) -> Dict[K, List[Path]]:
+    """Group files by their matching key, keeping only keys shared by 2+ files.
+
+    Counts each key first so every group list is allocated once at its final
+    size instead of growing append by append.
+    """
+    counts: Dict[K, int] = {}
+    for key in keys:
+        counts[key] = counts.get(key, 0) + 1
+
+    groups = {key: [None] * count for key, count in counts.items() if count > 1}
+    filled = dict.fromkeys(groups, 0)
+    for file_path, key in zip(files, keys):
+        group = groups.get(key)
+        if group is not None:
+            group[filled[key]] = file_path
+            filled[key] += 1
+    return groups
+
+
+def find_duplicates_by_title(
+    entries: List[FlacEntry], sizes: Dict[Path, int]
+) -> Dict[str, List[Path]]:
+    """Find duplicate files based on song titles.
+
+    `entries` comes from scan_flacs(); `sizes` is filled with the size of
+    every scanned file.
+    """
+    files = []
+    titles = []
+    for name, file_path, st in entries:
+        sizes[file_path] = st.st_size
+        files.append(file_path)
+        titles.append(extract_song_title(name))
+
+    # Group files by extracted song title, keeping only actual duplicates
+    return group_duplicates(files, titles)
+
+
+def find_duplicates_by_hash(
+    entries: List[FlacEntry], sizes: Dict[Path, int]
+) -> Dict[str, List[Path]]:
+    """Find duplicate files based on audio or file content hash.
+
+    Group keys are "audio:<md5>" for files matched by their STREAMINFO audio
+    MD5 and "content:<blake2b>" for files matched byte for byte. `entries`
+    comes from scan_flacs(); `sizes` is filled with the size of every
+    scanned file.
+    """
+    stats = {}
+    for _, file_path, st in entries:
+        sizes[file_path] = st.st_size
+        stats[file_path] = st
 
     print("Computing file hashes... This may take a while.")
-    for file_path in music_dir.glob("*.flac"):
-        file_hash = get_file_hash(file_path)
-        duplicates[file_hash].append(file_path)
+    try:
+        cache = HashCache()
+    except (OSError, sqlite3.Error) as e:
+        print(f"⚠️  Hash cache unavailable ({e}). Hashing without it.")
+        cache = None
+
+    # Hashing is I/O-bound and hashlib releases the GIL, so threads scale well.
+    # The cache connection stays on this thread; workers only read files.
+    with ThreadPoolExecutor(max_workers=HASH_WORKERS) as executor:
+        # STREAMINFO is only a few bytes into the file and ignores tags and
+        # cover art. Files whose audio format and length differ can't be
+        # duplicates, so only colliding groups go on to the audio MD5 check.
+        # Files that aren't FLAC go straight to content hashing.
+        all_files = sorted(stats)
+        streaminfos = {}
+        unsigned = []
+        for file_path, info in zip(
+            all_files, executor.map(read_flac_streaminfo, all_files)
+        ):
+            if info is not None:
+                streaminfos[file_path] = info
+            else:
+                unsigned.append(file_path)
 
-    return {hash_val: files for hash_val, files in duplicates.items() if len(files) > 1}
+        known_length = [f for f in streaminfos if streaminfos[f].total_samples]
+        format_groups = group_duplicates(
+            known_length, [streaminfos[f][:4] for f in known_length]
+        )
+        audio_candidates = {f for files in format_groups.values() for f in files}
+
+        # A total sample count of zero means unknown, so it can't rule anything
+        # out: such a file is matched against every file of the same sample
+        # rate, channels and bit depth, whatever their length
+        flac_files = list(streaminfos)
+        for files in group_duplicates(
+            flac_files, [streaminfos[f][:3] for f in flac_files]
+        ).values():
+            if any(not streaminfos[f].total_samples for f in files):
+                audio_candidates.update(files)
+
+        # Encoders that don't set the audio MD5 leave it all zero, so those
+        # files fall back to hashing content too. Keys are prefixed with their
+        # source so an audio MD5 and a content hash can never share a group.
+        file_hashes = {}
+        for file_path in sorted(audio_candidates):
+            md5 = streaminfos[file_path].md5
+            if any(md5):
+                file_hashes[file_path] = f"audio:{md5.hex()}"
+            else:
+                unsigned.append(file_path)
+
+        # Files with a unique size can't have a duplicate, so skip hashing them.
+        # Cached digests are used without reading the file at all.
+        size_groups = group_duplicates(unsigned, [stats[f].st_size for f in unsigned])
+        candidates = sorted(f for files in size_groups.values() for f in files)
+        to_sample = []
+        for file_path in candidates:
+            cached = cache.get(file_path, stats[file_path]) if cache else None
+            if cached is None:
+                to_sample.append(file_path)
+            else:
+                file_hashes[file_path] = f"content:{cached}"
+
+        # Cheap hash of the file head and tail narrows the remaining candidates
+        # before a full BLAKE2b read. Cached files skipped this stage, so a
+        # miss sharing its size with one must be fully hashed to compare.
+        sample_sizes = [stats[f].st_size for f in to_sample]
+        sample_groups = group_duplicates(
+            to_sample, list(executor.map(sample_hash, to_sample, sample_sizes))
+        )
+        cached_sizes = {stats[f].st_size for f in candidates if f in file_hashes}
+        to_hash = sorted(
+            {f for files in sample_groups.values() for f in files}
+            | {f for f in to_sample if stats[f].st_size in cached_sizes}
+        )
 
+        for file_path, file_hash in zip(to_hash, executor.map(get_file_hash, to_hash)):
+            file_hashes[file_path] = f"content:{file_hash}"
+            if cache is not None:
+                cache.put(file_path, file_hash, stats[file_path])
 
-def choose_file_to_keep(files: List[Path]) -> Path:
-    """Choose which file to keep based on various criteria."""
-    # Sort by file size (descending) then by filename
-    files_with_stats = [(f, f.stat().st_size) for f in files]
-    files_with_stats.sort(key=lambda x: (-x[1], x[0].name))
+    if cache is not None:
+        cache.commit()
+        cache.close()
 
-    # Keep the largest file (assuming better quality)
-    return files_with_stats[0][0]
+    hashed_files = sorted(file_hashes)
+    return group_duplicates(hashed_files, [file_hashes[f] for f in hashed_files])
 
 
-def display_duplicates(duplicates: Dict[str, List[Path]], by_hash: bool = False):
+def choose_file_to_keep(files: List[Path], sizes: Dict[Path, int]) -> Path:
+    """Choose which file to keep based on various criteria."""
+    # Keep the largest file (assuming better quality), ties broken by filename
+    return min(files, key=lambda f: (-sizes[f], f.name))
+
+
+def display_duplicates(
+    duplicates: Dict[str, List[Path]], sizes: Dict[Path, int], by_hash: bool = False
+):
     """Display found duplicates in a readable format."""
     if not duplicates:
         print("No duplicates found!")
         return
 
-    print(f"\nFound {len(duplicates)} groups of duplicates:")
-    print("=" * 60)
+    # Collect everything first and write it in one go instead of per line
+    lines = [f"\nFound {len(duplicates)} groups of duplicates:", "=" * 60]
 
     for identifier, files in duplicates.items():
         if by_hash:
-            print(f"\nDuplicate group (hash: {identifier[:8]}...):")
+            source, _, digest = identifier.partition(":")
+            lines.append(f"\nDuplicate group ({source} hash: {digest[:8]}...):")
         else:
-            print(f"\nDuplicate group: '{identifier}'")
+            lines.append(f"\nDuplicate group: '{identifier}'")
+
+        # Summarize very large groups instead of listing every file
+        shown = list(enumerate(files, 1))
+        if len(files) > 20:
+            shown = shown[:5] + [None] + shown[-2:]
+
+        for item in shown:
+            if item is None:
+                lines.append(f"  ...({len(files) - 7} more)")
+                continue
+            i, file_path = item
+            size_mb = sizes[file_path] / (1024 * 1024)
+            lines.append(f"  {i}. {file_path.name} ({size_mb:.1f}MB)")
 
-        for i, file_path in enumerate(files, 1):
-            size_mb = file_path.stat().st_size / (1024 * 1024)
-            print(f"  {i}. {file_path.name} ({size_mb:.1f}MB)")
+    sys.stdout.write("\n".join(lines) + "\n")
 
 
-def remove_duplicates(duplicates: Dict[str, List[Path]], dry_run: bool = True):
+def remove_duplicates(
+    duplicates: Dict[str, List[Path]], sizes: Dict[Path, int], dry_run: bool = True
+):
     """Remove duplicate files, keeping the best one from each group."""
     removed_count = 0
+    planned_count = sum(len(files) - 1 for files in duplicates.values())
+    errors: List[Tuple[Path, OSError]] = []
 
     for identifier, files in duplicates.items():
         if len(files) <= 1:
             continue
 
         # Choose file to keep
-        keep_file = choose_file_to_keep(files)
+        keep_file = choose_file_to_keep(files, sizes)
         files_to_remove = [f for f in files if f != keep_file]
 
         print(f"\nGroup: {identifier}")
@@ -143,18 +464,25 @@ def remove_duplicates(duplicates: Dict[str, List[Path]], dry_run: bool = True):
             else:
                 try:
                     file_to_remove.unlink()
-                    print(f"  Removed: {file_to_remove.name}")
-                    removed_count += 1
-                except Exception as e:
-                    print(f"  Error removing {file_to_remove.name}: {e}")
+                except FileNotFoundError:
+                    print(f"  Already gone: {file_to_remove.name}")
+                    continue
+                except OSError as e:
+                    errors.append((file_to_remove, e))
+                    continue
+                print(f"  Removed: {file_to_remove.name}")
+                removed_count += 1
 
     if dry_run:
-        print(
-            f"\nDry run completed. Would remove {sum(len(files) - 1 for files in duplicates.values())} files."
-        )
+        print(f"\nDry run completed. Would remove {planned_count} files.")
     else:
         print(f"\nRemoved {removed_count} duplicate files.")
 
+    if errors:
+        print(f"\n{len(errors)} errors:")
+        for file_path, e in errors:
+            print(f"  Error removing {file_path.name}: {e}")
+
 
 def move_to_dir(target_dir: Path) -> bool:
     assert target_dir
@@ -165,26 +493,83 @@ def move_to_dir(target_dir: Path) -> bool:
         print("No .flac files found in current directory.")
         return False
 
-    # mv with shell to expand *.flac
-    cmd = f"mv *.flac {str(target_dir)}"
-
     print(f"📦 Moving all .flac files to: {target_dir}")
-    result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
+    moved_count = 0
+    errors: List[Tuple[Path, OSError]] = []
+
+    for i, src in enumerate(flac_files, 1):
+        dst = target_dir / src.name
+        try:
+            try:
+                os.replace(src, dst)
+            except OSError as e:
+                if e.errno != errno.EXDEV:
+                    raise
+                # Target is on another filesystem, so copy then delete
+                shutil.move(str(src), str(dst))
+        except OSError as e:
+            errors.append((src, e))
+        else:
+            moved_count += 1
 
-    if result.returncode == 0:
-        print("✅ Moved successfully.")
-        return True
-    else:
-        print("❌ Move failed:", result.stderr)
+        if i % 100 == 0:
+            print(f"  Moved {moved_count}/{len(flac_files)} files...")
+
+    if errors:
+        print(f"❌ Moved {moved_count} files, {len(errors)} errors:")
+        for file_path, e in errors:
+            print(f"  Error moving {file_path.name}: {e}")
         return False
 
+    print("✅ Moved successfully.")
+    return True
+
 
-def update_music() -> bool:
+def get_mpd_music_dir() -> Optional[Path]:
+    """Read music_directory from the first MPD config file found."""
+    config_home = Path(os.environ.get("XDG_CONFIG_HOME", "~/.config")).expanduser()
+    candidates = [
+        config_home / "mpd" / "mpd.conf",
+        Path("~/.mpdconf").expanduser(),
+        Path("~/.mpd/mpd.conf").expanduser(),
+        Path("/etc/mpd.conf"),
+    ]
+
+    for config in candidates:
+        if not config.is_file():
+            continue
+        try:
+            with open(config, "r") as f:
+                for line in f:
+                    # Handles quoting and trailing "# ..." comments
+                    try:
+                        parts = shlex.split(line, comments=True)
+                    except ValueError:
+                        continue
+                    if len(parts) == 2 and parts[0] == "music_directory":
+                        return Path(parts[1]).expanduser()
+        except OSError:
+            continue
+        return None
+
+    return None
+
+
+def update_music(target_dir: Path) -> bool:
     if shutil.which("mpc") is None:
         print("⚠️  MPD (mpc) not found. Skipping update.")
         return False
 
-    cmd = ["mpc", "update"]
+    # Only rescan the directory we moved files into, if it's inside the library
+    cmd = ["mpc", "--wait", "update"]
+    music_dir = get_mpd_music_dir()
+    if music_dir is not None:
+        try:
+            relative = target_dir.resolve().relative_to(music_dir.resolve())
+        except ValueError:
+            relative = None
+        if relative is not None and relative != Path("."):
+            cmd.append(relative.as_posix())
 
     print("🎵 Updating MPD music database...")
     result = subprocess.run(cmd, capture_output=True, text=True)
@@ -200,36 +585,41 @@ def update_music() -> bool:
 def main():
     """Main function with user interface."""
 
-    url_list = []
-
     with open("list.txt", "r") as list_file:
-        while True:
-            url = list_file.readline()
-            if not url:
-                break
-            url_list.append(url.strip())
+        url_list = [line.strip() for line in list_file if line.strip()]
 
     # assert url_list
 
-    for playlist in url_list:
-        download_playlist(playlist)
+    # Keep concurrency low so yt-dlp doesn't get rate-limited
+    with ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS) as executor:
+        list(executor.map(download_playlist, url_list))
 
     clear()
 
-    directory = "."
+    directory = Path(".")
+    sizes = {}
+
+    if not directory.exists():
+        print(f"Directory {directory} does not exist!")
+        return
+
+    # Scan the directory in the background while the user picks a method
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        scan = executor.submit(scan_flacs, directory)
 
-    print("\nChoose deduplication method:")
-    print("1. By song title (faster, may have false positives)")
-    print("2. By file content hash (slower, more accurate)")
+        print("\nChoose deduplication method:")
+        print("1. By song title (faster, may have false positives)")
+        print("2. By audio content (slower, ignores differing tags and cover art)")
 
-    choice = input("Enter choice (1 or 2): ").strip()
+        choice = input("Enter choice (1 or 2): ").strip()
+        entries = scan.result()
 
     if choice == "1":
-        duplicates = find_duplicates_by_title(directory)
-        display_duplicates(duplicates, by_hash=False)
+        duplicates = find_duplicates_by_title(entries, sizes)
+        display_duplicates(duplicates, sizes, by_hash=False)
     elif choice == "2":
-        duplicates = find_duplicates_by_hash(directory)
-        display_duplicates(duplicates, by_hash=True)
+        duplicates = find_duplicates_by_hash(entries, sizes)
+        display_duplicates(duplicates, sizes, by_hash=True)
     else:
         print("Invalid choice!")
         return
@@ -243,7 +633,7 @@ def main():
         action = input("Enter choice (1, 2, or 3): ").strip()
 
         if action == "1":
-            remove_duplicates(duplicates, dry_run=True)
+            remove_duplicates(duplicates, sizes, dry_run=True)
         elif action == "2":
             confirm = (
                 input("Are you sure you want to remove files? (yes/no): ")
@@ -251,7 +641,7 @@ def main():
                 .lower()
             )
             if confirm == "yes":
-                remove_duplicates(duplicates, dry_run=False)
+                remove_duplicates(duplicates, sizes, dry_run=False)
             else:
                 print("Operation cancelled.")
         elif action == "3":
@@ -268,7 +658,7 @@ def main():
 
         if target_dir.exists():
             if move_to_dir(target_dir):
-                update_music()
+                update_music(target_dir)
         else:
             print("⚠️ Directory not found. Create it? (y/N)")
             answer = input("--> ").strip().lower()
@@ -276,7 +666,7 @@ def main():
             if answer == "y":
                 target_dir.mkdir(parents=True, exist_ok=True)
                 if move_to_dir(target_dir):
-                    update_music()
+                    update_music(target_dir)
             else:
                 print("Aborting.")
     except Exception as e: